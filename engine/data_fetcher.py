@@ -1,15 +1,31 @@
-import os, datetime as dt, warnings, tushare as ts, pandas as pd, time
+import datetime as dt, warnings, tushare as ts, pandas as pd, numpy as np
 import pyarrow.parquet as pq
 import hashlib
 from pathlib import Path
-from dotenv import load_dotenv; load_dotenv()
+from .rate_limiter import TUSHARE_BUCKET
+from .tushare_client import pro
 
 # 忽略来自pandas的FutureWarning
 warnings.filterwarnings("ignore", category=FutureWarning, module="pandas")
 # 忽略来自tushare的FutureWarning
 warnings.filterwarnings("ignore", category=FutureWarning, module="tushare")
 
-pro = ts.pro_api(os.getenv("TUSHARE_TOKEN"))
+FUND_DAILY_ROW_LIMIT = 2000  # fund_daily单次请求返回的最大行数
+FUND_DAILY_ROW_BUDGET = FUND_DAILY_ROW_LIMIT // 4  # 批量请求的预计行数上限，远低于接口上限以防截断
+
+def estimate_daily_rows(start: str, end: str) -> int:
+    """估算单个标的在区间内的日线行数（按工作日计，不少于实际交易日数）
+    
+    Args:
+        start: 起始日期，格式YYYYMMDD
+        end: 结束日期，格式YYYYMMDD
+        
+    Returns:
+        区间内的工作日数
+    """
+    start_day, end_day = (np.datetime64(dt.datetime.strptime(d, "%Y%m%d").date(), 'D') for d in (start, end))
+    # busday_count不含结束日，结束日加一天使区间闭合；起始晚于结束时为0
+    return max(int(np.busday_count(start_day, end_day + np.timedelta64(1, 'D'))), 0)
 
 def _get_data_hash(ts_code: str, start: str = None, end: str = None) -> str:
     """生成数据请求的哈希标识
@@ -164,73 +180,137 @@ def fetch_daily(ts_code: str, start: str = None, end: str = None, asset_type: st
             
         # 自动识别资产类型
         if asset_type == 'auto':
-            if ts_code.startswith(('510', '511', '512', '513', '515', '516', '518')):
-                asset_type = 'fund'  # ETF
-            elif (ts_code.startswith(('000', '399', '950')) and ('SH' in ts_code or 'SZ' in ts_code)) or \
-                (ts_code.endswith('.CSI')) or (ts_code.endswith('.CNI')):
-                # 指数（000300.SH, 399001.SZ, 932000.CSI等）
-                asset_type = 'index'
-            else:
-                asset_type = 'stock'  # 默认为股票
+            asset_type = detect_asset_type(ts_code)
         
         # 根据资产类型选择合适的接口
         if asset_type == 'fund':
             # ETF使用fund_daily接口
-            df = pro.fund_daily(ts_code=ts_code, start_date=start, end_date=end)
-            time.sleep(1.2)  # API频率控制：每分钟不超过50次
+            with TUSHARE_BUCKET:  # API频率控制：每分钟不超过50次
+                df = pro.fund_daily(ts_code=ts_code, start_date=start, end_date=end)
             if df is None or df.empty:
                 # 备选：使用pro_bar接口
-                df = ts.pro_bar(ts_code=ts_code, start_date=start, end_date=end, 
-                                freq='D', asset='FD')
-                time.sleep(1.2)  # API频率控制
+                with TUSHARE_BUCKET:
+                    df = ts.pro_bar(ts_code=ts_code, start_date=start, end_date=end, 
+                                    freq='D', asset='FD')
             # !TODO: ETF数据需要获取复权因子来进行额外处理
         elif asset_type == 'index':
             # 指数使用index_daily接口
-            df = pro.index_daily(ts_code=ts_code)
-            time.sleep(1.2)  # API频率控制：每分钟不超过50次
+            with TUSHARE_BUCKET:  # API频率控制：每分钟不超过50次
+                df = pro.index_daily(ts_code=ts_code)
             if df is None or df.empty:
                 # 备选：使用pro_bar接口
-                df = ts.pro_bar(ts_code=ts_code, freq='D', asset='I')
-                time.sleep(1.2)  # API频率控制
+                with TUSHARE_BUCKET:
+                    df = ts.pro_bar(ts_code=ts_code, freq='D', asset='I')
         else:
             # 股票使用原有逻辑
-            df = ts.pro_bar(ts_code=ts_code, start_date=start, end_date=end, 
-                            adj='qfq', freq='D', asset='E')
-            time.sleep(1.2)  # API频率控制：每分钟不超过50次
+            with TUSHARE_BUCKET:  # API频率控制：每分钟不超过50次
+                df = ts.pro_bar(ts_code=ts_code, start_date=start, end_date=end, 
+                                adj='qfq', freq='D', asset='E')
         
         # 如果主要接口失败，尝试通用pro_bar接口
         if df is None or df.empty:
             print(f"警告：主接口获取 {ts_code} 的数据为空，尝试通用接口...")
-            df = ts.pro_bar(ts_code=ts_code, adj='qfq', freq='D')
-            time.sleep(1.2)  # API频率控制
+            with TUSHARE_BUCKET:  # API频率控制
+                df = ts.pro_bar(ts_code=ts_code, adj='qfq', freq='D')
         
         # 如果数据仍然为空，则记录错误
         if df is None or df.empty:
             raise ValueError(f"无法获取 {ts_code} 的日线数据")
             
-        # 确保数据按日期排序
-        df = df.sort_values("trade_date")
-        
-        # 检查必要的列是否存在
-        required_cols = ["open", "high", "low", "close"]
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            raise ValueError(f"获取的数据缺少必要的列：{missing_cols}")
-        
-        # 确保包含vol和amount列（某些指数可能没有）
-        if 'vol' not in df.columns:
-            df['vol'] = 0  # 指数没有成交量，设为0
-        if 'amount' not in df.columns:
-            df['amount'] = 0  # 指数没有成交额，设为0
-        # 转换日期格式
-        df["trade_date"] = pd.to_datetime(df["trade_date"])
-        
-        # 提取需要的列并返回
-        return df.set_index("trade_date")
+        return _format_daily(df)
     except Exception as e:
         print(f"获取 {ts_code} 的日线数据时出错: {str(e)}")
         # 创建一个空的DataFrame作为替代
         return pd.DataFrame(columns=["ts_code", "open", "high", "low", "close", "vol", "amount"])
 
+def fetch_daily_batch(ts_codes: list, start: str, end: str = None) -> dict:
+    """批量获取ETF日线数据（fund_daily单次请求多个代码）
+    
+    调用方应按 estimate_daily_rows × 代码数 不超过 FUND_DAILY_ROW_BUDGET 划分批次。
+    返回结果中未覆盖到窗口末端（本次返回的最新交易日）或没有任何数据的代码，
+    视为可能被截断，逐个重新请求。
+    
+    Args:
+        ts_codes: ETF代码列表，以逗号拼接后一次请求
+        start: 起始日期，格式YYYYMMDD
+        end: 结束日期，格式YYYYMMDD。None表示到今天
+        
+    Returns:
+        {ts_code: 日线数据}，无新数据的代码不在字典中；
+        请求失败或返回行数触及接口上限（结果可能被截断）时返回None，由调用方逐个获取
+    """
+    if end is None:
+        end = dt.date.today().strftime("%Y%m%d")
+    try:
+        with TUSHARE_BUCKET:  # API频率控制：每分钟不超过50次
+            df = pro.fund_daily(ts_code=",".join(ts_codes), start_date=start, end_date=end)
+    except Exception as e:
+        print(f"批量获取 {len(ts_codes)} 个标的日线数据时出错: {str(e)}")
+        return None
+    
+    if df is None or df.empty:
+        return {}
+    if len(df) >= FUND_DAILY_ROW_LIMIT:
+        print(f"警告：批量获取 {len(ts_codes)} 个标的触及单次返回上限，改为逐个获取")
+        return None
+    
+    groups = dict(tuple(df.groupby("ts_code")))
+    window_end = df["trade_date"].max()
+    result = {}
+    try:
+        for code in ts_codes:
+            group = groups.get(code)
+            if group is None or group["trade_date"].max() < window_end:
+                # 未覆盖到窗口末端，批量结果可能被截断，单独补取该代码
+                with TUSHARE_BUCKET:
+                    group = pro.fund_daily(ts_code=code, start_date=start, end_date=end)
+            if group is not None and not group.empty:
+                result[code] = _format_daily(group)
+    except Exception as e:
+        print(f"逐个补取批量结果时出错: {str(e)}")
+        return None
+    
+    return result
+
+def detect_asset_type(ts_code: str) -> str:
+    """根据代码自动识别资产类型
+    
+    Args:
+        ts_code: 标的代码
+        
+    Returns:
+        'fund'(ETF), 'index'(指数) 或 'stock'(股票)
+    """
+    if ts_code.startswith(('510', '511', '512', '513', '515', '516', '518')):
+        return 'fund'  # ETF
+    elif (ts_code.startswith(('000', '399', '950')) and ('SH' in ts_code or 'SZ' in ts_code)) or \
+        (ts_code.endswith('.CSI')) or (ts_code.endswith('.CNI')):
+        # 指数（000300.SH, 399001.SZ, 932000.CSI等）
+        return 'index'
+    else:
+        return 'stock'  # 默认为股票
+
+def _format_daily(df: pd.DataFrame) -> pd.DataFrame:
+    """整理接口返回的日线数据：排序、补齐vol/amount、以trade_date为索引"""
+    # 确保数据按日期排序
+    df = df.sort_values("trade_date")
+    
+    # 检查必要的列是否存在
+    required_cols = ["open", "high", "low", "close"]
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"获取的数据缺少必要的列：{missing_cols}")
+    
+    # 确保包含vol和amount列（某些指数可能没有）
+    if 'vol' not in df.columns:
+        df['vol'] = 0  # 指数没有成交量，设为0
+    if 'amount' not in df.columns:
+        df['amount'] = 0  # 指数没有成交额，设为0
+    # 转换日期格式
+    df["trade_date"] = pd.to_datetime(df["trade_date"])
+    
+    # 提取需要的列并返回
+    return df.set_index("trade_date")
+
 # 删除财务数据获取函数，ETF/指数不需要财务数据
 # def fetch_financial() 函数已移除
@@ -6,6 +6,8 @@
 import os
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import yaml
@@ -79,11 +81,11 @@ class DataInterface:
         filter_enabled = self.config.get('universe_filter', {}).get('enabled', False)
         if filter_enabled and high_quality_file.exists():
             print(f"使用高质量universe: {high_quality_file}")
-            df = pd.read_csv(high_quality_file)
+            df = pd.read_csv(high_quality_file, usecols=['ts_code'], dtype={'ts_code': str})  # 只需代码列
             return df['ts_code'].tolist()
         elif original_universe_file.exists():
             print(f"使用原始universe: {original_universe_file}")
-            df = pd.read_csv(original_universe_file)
+            df = pd.read_csv(original_universe_file, usecols=['ts_code'], dtype={'ts_code': str})
             return df['ts_code'].tolist()
         else:
             # 如果没有universe文件，从processed数据推断
@@ -151,15 +153,13 @@ class DataInterface:
                     print(f"文件 {parquet_file} 缺少 ts_code 字段，跳过")
                     continue
                 
-                ts_codes = df['ts_code'].unique()
+                # 只处理universe中的标的：按集合一次性筛选行，再按代码分组，避免逐代码构造比较掩码
+                df = df.loc[df['ts_code'].isin(target_codes)]
                 
-                for ts_code in ts_codes:
-                    # 只处理universe中的标的
-                    if ts_code not in target_codes:
-                        continue
-                        
-                    stock_data = df[df['ts_code'] == ts_code].copy()
-                    stock_data = stock_data.sort_index()
+                for ts_code, stock_data in df.groupby('ts_code', sort=False):
+                    # Parquet通常按trade_date顺序写入，已有序时跳过排序
+                    if not stock_data.index.is_monotonic_increasing:
+                        stock_data = stock_data.sort_index()
                     
                     # 过滤日期范围
                     mask = (stock_data.index >= start_date) & (stock_data.index <= end_date)
@@ -194,9 +194,12 @@ class DataInterface:
                     common_index = common_index.intersection(df.index)
         
         if common_index is not None and len(common_index) > 0:
+            # 公共索引只排序一次，reindex后各字段即为有序，无需逐字段sort_index
+            if not common_index.is_monotonic_increasing:
+                common_index = common_index.sort_values()
             for field in price_data.keys():
                 if not price_data[field].empty:
-                    price_data[field] = price_data[field].reindex(common_index).sort_index()
+                    price_data[field] = price_data[field].reindex(common_index)
                 else:
                     # 如果某个字段完全为空，创建空的DataFrame但保持正确的索引
                     price_data[field] = pd.DataFrame(index=common_index)
@@ -235,8 +238,14 @@ class DataInterface:
         if close.empty:
             return pd.DataFrame()
         
-        # 计算前瞻收益率
-        forward_ret = close.pct_change(days, fill_method=None).shift(-days)
+        # 计算前瞻收益率：ret[t] = close[t+N] / close[t] - 1，直接在数组上计算，无需pct_change+shift
+        values = close.to_numpy(dtype=np.float64, na_value=np.nan)
+        ret = np.full_like(values, np.nan)
+        if days < len(values):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(values[days:], values[:-days], out=ret[:-days])
+            ret[:-days] -= 1
+        forward_ret = pd.DataFrame(ret, index=close.index, columns=close.columns)
         
         print(f"前瞻{days}日收益率计算完成")
         return forward_ret
@@ -246,7 +255,7 @@ class DataInterface:
         return self.universe
     
     def save_factor_data(self, factor_data: pd.DataFrame, factor_name: str):
-        """保存因子数据
+        """保存因子数据（Zstd压缩的Arrow IPC/Feather V2格式）
         
         Args:
             factor_data: 因子数据
@@ -255,12 +264,13 @@ class DataInterface:
         output_path = self.base_path / self.config['paths']['factors_output']
         output_path.mkdir(parents=True, exist_ok=True)
         
-        file_path = output_path / f"{factor_name}.parquet"
-        factor_data.to_parquet(file_path)
+        file_path = output_path / f"{factor_name}.arrow"
+        table = pa.Table.from_pandas(factor_data)
+        feather.write_feather(table, file_path, compression='zstd', compression_level=3)
         print(f"因子数据已保存: {file_path}")
     
     def load_factor_data(self, factor_name: str) -> pd.DataFrame:
-        """加载因子数据
+        """加载因子数据（内存映射读取Arrow文件，兼容旧版Parquet文件）
         
         Args:
             factor_name: 因子名称
@@ -268,9 +278,13 @@ class DataInterface:
         Returns:
             因子数据 DataFrame
         """
-        file_path = self.base_path / self.config['paths']['factors_output'] / f"{factor_name}.parquet"
+        output_path = self.base_path / self.config['paths']['factors_output']
+        file_path = output_path / f"{factor_name}.arrow"
+        legacy_path = output_path / f"{factor_name}.parquet"
         if file_path.exists():
-            return pd.read_parquet(file_path)
+            return feather.read_table(file_path, memory_map=True).to_pandas()
+        elif legacy_path.exists():
+            return pd.read_parquet(legacy_path)
         else:
             raise FileNotFoundError(f"因子文件不存在: {file_path}")
     
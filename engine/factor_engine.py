@@ -3,12 +3,17 @@
 精简版因子计算引擎 - 模块化重构版本
 通过继承各个因子类别实现功能分离
 """
+import copy
+import functools
+import os
 import numpy as np
 import pandas as pd
 import yaml
 from pathlib import Path
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
 import warnings
 
 # 导入各个因子模块
@@ -25,6 +30,38 @@ from .factors.math_factors import MathFactors
 warnings.filterwarnings('ignore', category=FutureWarning, message='.*fillna.*method.*')
 warnings.filterwarnings('ignore', category=FutureWarning, message='.*Downcasting.*')
 
+
+@functools.lru_cache(maxsize=1)
+def _read_config(config_file: str, mtime: float) -> dict:
+    """解析YAML配置（按路径和修改时间缓存，文件变化后自动失效）"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+class _Float64PriceData(Mapping):
+    """价格数据的float64只读视图
+    
+    各字段在首次被因子读取时才转换并缓存，转换失败的异常在该因子自身的
+    异常处理中抛出，只影响用到该字段的因子。
+    """
+    
+    def __init__(self, price_data: Dict[str, pd.DataFrame]):
+        self._raw = price_data
+        self._converted = {}
+    
+    def __getitem__(self, field: str) -> pd.DataFrame:
+        if field not in self._converted:
+            df = self._raw[field]
+            self._converted[field] = df.astype(np.float64, copy=False) if not df.empty else df
+        return self._converted[field]
+    
+    def __iter__(self):
+        return iter(self._raw)
+    
+    def __len__(self):
+        return len(self._raw)
+
+
 class FactorEngine(PriceFactors, OverlapFactors, MomentumFactors, VolumeFactors, TechnicalFactors, PatternFactors, MathFactors):
     """
     模块化因子计算引擎
@@ -42,10 +79,10 @@ class FactorEngine(PriceFactors, OverlapFactors, MomentumFactors, VolumeFactors,
         self.preprocessing_config = self.config.get('preprocessing', {})
         
     def _load_config(self, config_path: str) -> dict:
-        """加载配置文件"""
+        """加载配置文件（重复实例化时复用已解析的配置）"""
         config_file = self.base_path / config_path
-        with open(config_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        config = _read_config(str(config_file), os.path.getmtime(config_file))
+        return copy.deepcopy(config)
     
     def compute_factor(self, factor_name: str, price_data: Dict[str, pd.DataFrame], 
                       fin_data: Dict[str, pd.DataFrame] = None) -> pd.DataFrame:
@@ -534,6 +571,36 @@ class FactorEngine(PriceFactors, OverlapFactors, MomentumFactors, VolumeFactors,
             print(f"计算因子 {factor_name} 时出错: {e}")
             return pd.DataFrame()
     
+    def compute_factors(self, factor_names: List[str], price_data: Dict[str, pd.DataFrame], 
+                        fin_data: Dict[str, pd.DataFrame] = None, 
+                        max_workers: int = 1) -> Dict[str, pd.DataFrame]:
+        """批量计算多个因子
+        
+        价格矩阵在首次使用时转换为float64并在各因子间共用，避免重复转换；
+        默认串行计算，max_workers大于1时用线程池并行（仅在因子以TA-Lib等
+        释放GIL的C代码为主时有收益，各因子日志可能交错输出）
+        
+        Args:
+            factor_names: 因子名称列表
+            price_data: 价格数据字典
+            fin_data: 财务数据字典 (ETF/指数不使用，保留兼容性)
+            max_workers: 并行线程数，默认1为串行计算
+            
+        Returns:
+            {因子名称: 因子矩阵}，按factor_names顺序；计算失败的因子为空DataFrame
+        """
+        shared_data = _Float64PriceData(price_data)
+        
+        if max_workers <= 1:
+            return {factor_name: self.compute_factor(factor_name, shared_data, fin_data) 
+                    for factor_name in factor_names}
+        
+        # map保证结果按factor_names顺序返回
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(lambda name: self.compute_factor(name, shared_data, fin_data), 
+                                   factor_names)
+            return dict(zip(factor_names, results))
+    
     def compute_all_factors(self, price_data: Dict[str, pd.DataFrame], 
                            fin_data: Dict[str, pd.DataFrame] = None) -> pd.DataFrame:
         """计算所有启用的因子 (适配ETF/指数，财务数据可选)
@@ -545,30 +612,22 @@ class FactorEngine(PriceFactors, OverlapFactors, MomentumFactors, VolumeFactors,
         Returns:
             所有因子的MultiIndex DataFrame (factor, ts_code)
         """
-        factors_dict = {}
         enabled_factors = [name for name, config in self.config['factors'].items() 
                           if config.get('enabled', True)]
         
         self._log_progress(f"开始计算 {len(enabled_factors)} 个因子: {enabled_factors}")
         
-        for factor_name in enabled_factors:
-            factor_result = self.compute_factor(factor_name, price_data, fin_data)
-            if not factor_result.empty:
-                factors_dict[factor_name] = factor_result
+        factors_dict = {factor_name: factor_result for factor_name, factor_result 
+                        in self.compute_factors(enabled_factors, price_data, fin_data).items() 
+                        if not factor_result.empty}
         
         if not factors_dict:
             print("没有成功计算的因子")
             return pd.DataFrame()
         
-        # 创建MultiIndex DataFrame
-        result_list = []
-        for factor_name, factor_matrix in factors_dict.items():
-            factor_stacked = factor_matrix.stack()
-            factor_stacked.name = factor_name
-            result_list.append(factor_stacked.to_frame().T)
-        
-        # 合并所有因子
-        all_factors = pd.concat(result_list, axis=0).sort_index(axis=0)
+        # 各因子矩阵按列一次性合并为MultiIndex DataFrame (factor, ts_code)，
+        # 无需逐因子stack/转置后再拼接
+        all_factors = pd.concat(factors_dict, axis=1, names=['factor', 'ts_code']).sort_index(axis=0)
         
         self._log_progress(f"所有因子计算完成，最终形状: {all_factors.shape}")
         return all_factors
@@ -33,31 +33,47 @@ class BaseFactor:
         if factor.empty:
             return factor
             
-        # 截面标准化，但要处理标准差为0的情况
-        result = factor.copy()
+        # 截面标准化：在底层数组上一次性计算各行均值/标准差并完成变换，避免逐行.loc赋值
+        values = factor.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        counts = valid.sum(axis=1)
         
-        for idx in factor.index:
-            row = factor.loc[idx]
-            if row.isna().all():
-                continue
-                
-            # 计算截面均值和标准差
-            row_mean = row.mean()
-            row_std = row.std()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            row_mean = np.where(valid, values, 0.0).sum(axis=1) / counts
+            centered = values - row_mean[:, None]
+            row_std = np.sqrt(np.square(np.where(valid, centered, 0.0)).sum(axis=1) / (counts - 1))
             
-            # 如果标准差为0（所有值相同），不进行标准化，保持原值
-            if pd.isna(row_std) or row_std == 0 or np.isclose(row_std, 0, atol=1e-10):
-                # 对于CDL等离散值因子，如果所有值相同，可以直接设为0
-                # 或者保持原值，这里选择保持原值
-                result.loc[idx] = row
-            else:
-                # 正常标准化
-                result.loc[idx] = (row - row_mean) / row_std
+            # 标准差为0（所有值相同）或无法计算时不进行标准化，保持原值
+            # 对于CDL等离散值因子，所有值相同时保持原值
+            scalable = np.isfinite(row_std) & (row_std > 1e-10)
+            result = np.where(scalable[:, None], centered / row_std[:, None], values)
         
         # 处理无限值和NaN
-        result = result.replace([np.inf, -np.inf], np.nan)
+        result[np.isinf(result)] = np.nan
         
-        return result
+        return pd.DataFrame(result, index=factor.index, columns=factor.columns)
+    
+    def fast_pct_change(self, data: pd.DataFrame, periods: int = 1) -> pd.DataFrame:
+        """N期收益率，等价于 data.pct_change(periods, fill_method=None)
+        
+        直接在底层数组上计算 a[t] / a[t-N] - 1，避免pandas构造shift副本和对齐
+        
+        Args:
+            data: 价格矩阵
+            periods: 间隔期数（正整数）
+            
+        Returns:
+            收益率矩阵，前periods行为NaN
+        """
+        values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+        result = np.full_like(values, np.nan)
+        
+        if periods < len(values):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(values[periods:], values[:-periods], out=result[periods:])
+            result[periods:] -= 1
+        
+        return pd.DataFrame(result, index=data.index, columns=data.columns)
     
     def winsorize(self, factor: pd.DataFrame, quantile: float = 0.05) -> pd.DataFrame:
         """去极值处理
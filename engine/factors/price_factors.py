@@ -27,7 +27,7 @@ class PriceFactors(BaseFactor):
         """
         if not self.validate_input_data(close):
             return pd.DataFrame()
-        return close.pct_change(window, fill_method=None)
+        return self.fast_pct_change(close, window)
     
     def mom_10(self, close: pd.DataFrame, window: int = 10) -> pd.DataFrame:
         """动量因子：10日价格动量
@@ -55,7 +55,7 @@ class PriceFactors(BaseFactor):
         """
         if not self.validate_input_data(close):
             return pd.DataFrame()
-        return -close.pct_change(window, fill_method=None)
+        return -self.fast_pct_change(close, window)
     
     def volatility_20(self, close: pd.DataFrame, window: int = 20) -> pd.DataFrame:
         """波动率因子：N日收益率标准差
@@ -69,7 +69,7 @@ class PriceFactors(BaseFactor):
         """
         if not self.validate_input_data(close):
             return pd.DataFrame()
-        returns = close.pct_change(fill_method=None)
+        returns = self.fast_pct_change(close)
         return returns.rolling(window).std()
     
     def macd_signal(self, close: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
@@ -159,7 +159,7 @@ class PriceFactors(BaseFactor):
         if not self.validate_input_data(close, amount):
             return pd.DataFrame()
         
-        returns = close.pct_change(fill_method=None).abs()
+        returns = self.fast_pct_change(close).abs()
         illiq = (returns / amount.replace(0, np.nan)).rolling(window).mean()
         return -illiq  # 取负值，大值表示流动性好
     
@@ -54,24 +54,26 @@ class ICEngine:
         factor_aligned = factor_df.reindex(common_dates)
         ret_aligned = ret_df.reindex(common_dates)
         
+        # 一次性取出二维数组并统计每日有效样本数，避免逐日.loc取行
+        factor_matrix = factor_aligned.to_numpy(dtype='float64', na_value=np.nan)
+        ret_matrix = ret_aligned.to_numpy(dtype='float64', na_value=np.nan)
+        valid_mask = ~np.isnan(factor_matrix) & ~np.isnan(ret_matrix)
+        valid_counts = valid_mask.sum(axis=1)
+        
         ic_list = []
         min_samples = self.ic_config.get('min_samples', 30)
         
-        for date in common_dates:
+        for i, date in enumerate(common_dates):
             try:
-                # 获取当日数据
-                factor_values = factor_aligned.loc[date].values
-                ret_values = ret_aligned.loc[date].values
-                
-                # 过滤缺失值
-                mask = ~pd.isna(factor_values) & ~pd.isna(ret_values)
-                
-                if mask.sum() < min_samples:
+                # 样本不足的日期直接跳过
+                if valid_counts[i] < min_samples:
                     ic_list.append(np.nan)
                     continue
                 
-                factor_clean = factor_values[mask]
-                ret_clean = ret_values[mask]
+                # 获取当日数据并过滤缺失值
+                mask = valid_mask[i]
+                factor_clean = factor_matrix[i, mask]
+                ret_clean = ret_matrix[i, mask]
                 
                 # 检查是否为常数数组（避免警告）
                 factor_unique = len(np.unique(factor_clean))
@@ -0,0 +1,51 @@
+"""
+接口调用频率控制
+令牌桶限流器，多线程共享同一额度，只有实际发起请求时才消耗令牌
+"""
+import time, threading
+
+class TokenBucket:
+    """令牌桶限流器
+    
+    每 per/rate 秒补充一个令牌，桶中最多保存 capacity 个令牌；
+    用作上下文管理器时在进入前获取一个令牌，令牌不足则等待。
+    """
+    
+    def __init__(self, rate: int, per: float = 60.0, capacity: int = 1):
+        """初始化令牌桶
+        
+        Args:
+            rate: 每个周期允许的请求数
+            per: 周期长度（秒）
+            capacity: 桶容量，即允许的最大突发请求数
+        """
+        self.interval = per / rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) / self.interval)
+            self._last = now
+            
+            # 预扣令牌：不足时按欠额计算等待时间，持锁等待以保证调用顺序与间隔
+            self._tokens -= 1
+            wait = -self._tokens * self.interval if self._tokens < 0 else 0.0
+            if wait > 0:
+                time.sleep(wait)
+                self._tokens = 0.0
+                self._last = time.monotonic()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+# Tushare接口频率控制：每分钟不超过50次，进程内所有线程共享
+TUSHARE_BUCKET = TokenBucket(rate=50, per=60.0)
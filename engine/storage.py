@@ -14,6 +14,47 @@ def _hash_df(df):
     h = hashlib.md5(pd.util.hash_pandas_object(df, index=True).values)
     return f"{len(df)}_{len(df.columns)}_{h.hexdigest()[:6]}"
 
+def processed_path(base_dir: str, name: str) -> str:
+    """获取processed数据文件路径
+    
+    Args:
+        base_dir: 基础目录路径
+        name: 文件名（不含扩展名）
+        
+    Returns:
+        base_dir/data/processed/{name}.parquet
+    """
+    return os.path.join(base_dir, "data", "processed", f"{name}.parquet")
+
+def read_max_date(path: str, date_col: str = "trade_date"):
+    """从Parquet元数据中读取最大日期（不读取数据页）
+    
+    Args:
+        path: Parquet文件路径
+        date_col: 日期列名（写入时的索引列）
+        
+    Returns:
+        最大日期pd.Timestamp；文件不存在或无统计信息时返回None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        meta = pq.read_metadata(path)
+        col_idx = meta.schema.to_arrow_schema().get_field_index(date_col)
+        if col_idx < 0 or meta.num_row_groups == 0:
+            return None
+        max_date = None
+        for i in range(meta.num_row_groups):
+            stats = meta.row_group(i).column(col_idx).statistics
+            if stats is None or not stats.has_min_max:
+                return None
+            rg_max = pd.Timestamp(stats.max)
+            if max_date is None or rg_max > max_date:
+                max_date = rg_max
+        return max_date
+    except Exception:
+        return None
+
 def to_parquet_partition(df: pd.DataFrame, base_dir: str, name: str):
     """存储数据为Parquet格式（简化版，无分区）
     
@@ -26,9 +67,8 @@ def to_parquet_partition(df: pd.DataFrame, base_dir: str, name: str):
         None
     """
     # 直接存储在 base_dir/data/processed/ 下
-    dir_ = os.path.join(base_dir, "data", "processed")
-    os.makedirs(dir_, exist_ok=True)
-    path = f"{dir_}/{name}.parquet"
+    path = processed_path(base_dir, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
     if os.path.exists(path):
         old = pq.read_table(path).to_pandas()
         if _hash_df(old) == _hash_df(df): return  # 无变化
@@ -0,0 +1,129 @@
+"""
+Tushare接口响应磁盘缓存
+按(接口名, 参数)缓存pro_api返回的DataFrame，超过有效期(TTL)后重新请求
+"""
+import os, json, time, hashlib, functools, threading
+from collections import OrderedDict
+import pandas as pd
+
+from .rate_limiter import TUSHARE_BUCKET
+
+# 缓存目录：项目根目录下的 cache/tushare
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "tushare")
+
+BASIC_TTL = 86400  # 基础信息（ETF/指数列表）每日最多变化一次
+MEMORY_CACHE_SIZE = 32  # 进程内缓存的接口结果数量上限
+
+# 进程内缓存（L1）：{(接口名, 参数元组): (实际请求接口的时间, DataFrame)}，按最近使用排序
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+def _cache_key(endpoint: str, kwargs: dict) -> str:
+    """生成缓存键
+    
+    Args:
+        endpoint: Tushare接口名，如'fund_basic'
+        kwargs: 接口参数
+    
+    Returns:
+        接口名与参数的md5哈希字符串
+    """
+    request_str = endpoint + json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.md5(request_str.encode()).hexdigest()
+
+def cached(ttl_seconds: int = BASIC_TTL, cache_dir: str = CACHE_DIR):
+    """为 func(pro, endpoint, **kwargs) 形式的接口调用添加磁盘缓存
+    
+    数据保存为 {key}.parquet，请求时间和参数保存在同名 .json 旁注文件中；
+    空结果和请求失败不缓存。返回的DataFrame在 attrs['fetched_at'] 中记录请求时间。
+    
+    Args:
+        ttl_seconds: 缓存有效期（秒）
+        cache_dir: 缓存目录
+    
+    Returns:
+        装饰器
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(pro, endpoint: str, **kwargs) -> pd.DataFrame:
+            key = _cache_key(endpoint, kwargs)
+            data_path = os.path.join(cache_dir, f"{key}.parquet")
+            meta_path = os.path.join(cache_dir, f"{key}.json")
+            
+            # 命中且未过期时直接读取本地文件
+            if os.path.exists(data_path) and os.path.exists(meta_path):
+                try:
+                    with open(meta_path, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    if time.time() - meta['fetched_at'] < ttl_seconds:
+                        cached_df = pd.read_parquet(data_path)
+                        cached_df.attrs['fetched_at'] = meta['fetched_at']
+                        return cached_df
+                except Exception:
+                    pass  # 缓存损坏时重新请求
+            
+            df = func(pro, endpoint, **kwargs)
+            fetched_at = time.time()
+            
+            if df is not None and not df.empty:
+                df.attrs['fetched_at'] = fetched_at
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = data_path + ".tmp"
+                df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, data_path)
+                with open(meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'endpoint': endpoint, 'params': kwargs, 'fetched_at': fetched_at},
+                              f, ensure_ascii=False, default=str)
+            return df
+        return wrapper
+    return decorator
+
+@cached(ttl_seconds=BASIC_TTL)
+def _call_pro_disk(pro, endpoint: str, **kwargs) -> pd.DataFrame:
+    """调用Tushare接口（磁盘TTL缓存，L2）
+    
+    仅在两级缓存均未命中时执行，此时才获取频率令牌，缓存命中无需等待。
+    """
+    with TUSHARE_BUCKET:  # API频率控制：每分钟不超过50次
+        return getattr(pro, endpoint)(**kwargs)
+
+def _call_pro_memory(pro, endpoint: str, params: tuple, ttl_seconds: int = BASIC_TTL) -> pd.DataFrame:
+    """进程内LRU缓存（L1），参数以排序后的(键, 值)元组作为缓存键
+    
+    与磁盘缓存采用相同的有效期，按数据实际请求时间计算（来自磁盘缓存的数据沿用其请求时间），
+    过期后重新经由磁盘缓存获取；空结果不缓存。
+    """
+    key = (endpoint, params)
+    with _memory_lock:
+        entry = _memory_cache.get(key)
+        if entry is not None and time.time() - entry[0] < ttl_seconds:
+            _memory_cache.move_to_end(key)
+            return entry[1]
+    
+    df = _call_pro_disk(pro, endpoint, **dict(params))
+    
+    if df is not None and not df.empty:
+        with _memory_lock:
+            _memory_cache[key] = (df.attrs.get('fetched_at', time.time()), df)
+            _memory_cache.move_to_end(key)
+            while len(_memory_cache) > MEMORY_CACHE_SIZE:
+                _memory_cache.popitem(last=False)
+    return df
+
+def call_pro(pro, endpoint: str, **kwargs) -> pd.DataFrame:
+    """调用Tushare接口（进程内LRU缓存 + 磁盘TTL缓存 + 频率控制）
+    
+    同一进程内重复请求直接返回内存结果；进程间通过磁盘缓存复用；
+    只有实际请求接口时才消耗频率令牌。
+    
+    Args:
+        pro: Tushare pro_api 客户端
+        endpoint: 接口名，如'fund_basic'、'index_basic'
+        **kwargs: 接口参数（须为可哈希的标量）
+        
+    Returns:
+        接口返回的DataFrame（副本，调用方修改不影响缓存）
+    """
+    df = _call_pro_memory(pro, endpoint, tuple(sorted(kwargs.items())))
+    return df.copy() if df is not None else df
@@ -0,0 +1,26 @@
+"""
+Tushare客户端
+进程内共享的pro_api实例及统一调用入口（缓存 + 频率控制）
+"""
+import os
+import tushare as ts
+import pandas as pd
+from dotenv import load_dotenv
+
+from .tushare_cache import call_pro
+
+# 加载环境变量并初始化Tushare，导入本模块的脚本共享同一个客户端
+load_dotenv()
+pro = ts.pro_api(os.getenv("TUSHARE_TOKEN"))
+
+def call(endpoint: str, **kwargs) -> pd.DataFrame:
+    """通过共享客户端调用Tushare接口
+    
+    Args:
+        endpoint: 接口名，如'fund_basic'、'index_basic'
+        **kwargs: 接口参数
+    
+    Returns:
+        接口返回的DataFrame（带进程内及磁盘缓存，仅缓存未命中时受频率控制）
+    """
+    return call_pro(pro, endpoint, **kwargs)
@@ -7,13 +7,61 @@ Universe质量筛选引擎
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 from pathlib import Path
 import glob
+import os
 import yaml
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 import logging
 
+# 质量分析涉及的价格字段
+QUALITY_FIELDS = ['close', 'vol', 'amount', 'open', 'high', 'low']
+
+# 单个标的的原始质量指标（字段有效值个数，字段不存在时为NaN）
+QUALITY_METRICS = (['total_days'] + [f'{field}_valid' for field in QUALITY_FIELDS] + 
+                   ['date_min', 'date_max'])
+
+# 数据质量指标磁盘缓存（相对项目根目录）
+QUALITY_CACHE_FILE = "data/cache/quality_metrics.parquet"
+
+def _valid_count(column: pa.ChunkedArray) -> int:
+    """统计Arrow列中的有效值个数（既非null也非NaN）"""
+    valid = len(column) - column.null_count
+    if pa.types.is_floating(column.type):
+        valid -= pc.sum(pc.is_nan(column)).as_py() or 0
+    return valid
+
+def _build_quality_frame(records: Dict[str, Dict]) -> pd.DataFrame:
+    """将各标的的扁平指标记录整理为按列存储的质量指标表
+    
+    Args:
+        records: {ts_code: 指标记录}，记录包含QUALITY_METRICS中的字段
+        
+    Returns:
+        以ts_code为索引的DataFrame，附加各字段覆盖率及综合评分列
+    """
+    df = pd.DataFrame.from_dict(records, orient='index', columns=QUALITY_METRICS)
+    df.index.name = 'ts_code'
+    
+    # 指标均为小计数或[0,1]比例，使用32位类型；有效值个数含NaN（字段不存在），用float32
+    df = df.astype({'total_days': 'int32', **{f'{field}_valid': 'float32' for field in QUALITY_FIELDS}})
+    
+    # 各字段覆盖率（字段不存在时为NaN）
+    for field in QUALITY_FIELDS:
+        df[f'{field}_coverage'] = df[f'{field}_valid'] / df['total_days'].astype('float32')
+    
+    # 加权综合评分：收盘价80%，成交量和成交额各10%
+    df['overall_score'] = (df['close_coverage'].fillna(0) * np.float32(0.8) + 
+                           df['vol_coverage'].fillna(0) * np.float32(0.1) + 
+                           df['amount_coverage'].fillna(0) * np.float32(0.1))
+    return df
+
 class UniverseFilter:
     """Universe质量筛选器"""
     
@@ -26,6 +74,8 @@ class UniverseFilter:
         self.base_path = Path(__file__).parent.parent
         self.config = self._load_config(config_path)
         self.logger = self._setup_logger()
+        # 数据质量指标缓存 {(start_date, end_date): quality_info}，与筛选阈值无关
+        self._quality_cache = {}
         
     def _load_config(self, config_path: str) -> dict:
         """加载配置文件"""
@@ -47,7 +97,7 @@ class UniverseFilter:
             
         return logger
     
-    def analyze_data_quality(self, start_date: str = None, end_date: str = None) -> Dict[str, Dict]:
+    def analyze_data_quality(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """分析数据质量
         
         Args:
@@ -55,7 +105,7 @@ class UniverseFilter:
             end_date: 结束日期，格式YYYY-MM-DD
             
         Returns:
-            数据质量分析结果字典
+            数据质量指标表，以ts_code为索引，每列一个指标
         """
         start_date = start_date or self.config['data']['start_date']
         end_date = end_date or self.config['data']['end_date']
@@ -64,6 +114,11 @@ class UniverseFilter:
         start_date = pd.to_datetime(start_date).strftime('%Y-%m-%d')
         end_date = pd.to_datetime(end_date).strftime('%Y-%m-%d')
         
+        # 质量指标只取决于日期范围，同一实例内重复调用直接复用
+        cache_key = (start_date, end_date)
+        if cache_key in self._quality_cache:
+            return self._quality_cache[cache_key]
+        
         self.logger.info(f"分析数据质量: {start_date} 到 {end_date}")
         
         # 读取原始universe文件
@@ -72,89 +127,180 @@ class UniverseFilter:
         
         if not universe_path.exists():
             self.logger.error(f"未找到universe文件: {universe_path}")
-            return {}
+            return pd.DataFrame()
         
-        universe_df = pd.read_csv(universe_path)
-        universe_codes = set(universe_df['ts_code'].tolist())
+        universe_df = pd.read_csv(universe_path, usecols=['ts_code'], dtype={'ts_code': str})  # 只需代码列
+        universe_codes = list(dict.fromkeys(universe_df['ts_code'].tolist()))
         
-        # 扫描数据文件
+        # 由universe代码直接构造数据文件路径，不遍历无关文件
         processed_path = self.base_path / self.config['paths']['processed_data']
-        parquet_files = glob.glob(str(processed_path / "**/*.parquet"), recursive=True)
-        
-        self.logger.info(f"扫描数据文件: {len(parquet_files)} 个文件")
-        
-        quality_info = {}
-        matched_count = 0
-        
-        for file_path in parquet_files:
-            try:
-                file_name = Path(file_path).stem
-                code = file_name
-                
-                if code not in universe_codes:
-                    continue
-                
-                df = pd.read_parquet(file_path)
-                
-                # 统一处理日期索引
-                if df.index.name == 'trade_date':
-                    df.index = pd.to_datetime(df.index)
-                elif 'trade_date' in df.columns:
-                    df['trade_date'] = pd.to_datetime(df['trade_date'])
-                    df = df.set_index('trade_date')
-                
-                if df.empty:
-                    continue
-                
-                # 过滤到指定日期范围
-                mask = (df.index >= start_date) & (df.index <= end_date)
-                df_period = df[mask]
-                
-                if df_period.empty:
-                    continue
-                
-                # 计算数据质量指标
-                total_days = len(df_period)
-                
-                # 检查各字段的完整性
-                fields_quality = {}
-                for field in ['close', 'vol', 'amount', 'open', 'high', 'low']:
-                    if field in df_period.columns:
-                        valid_count = df_period[field].notna().sum()
-                        fields_quality[field] = {
-                            'valid_count': valid_count,
-                            'total_count': total_days,
-                            'coverage_rate': valid_count / total_days if total_days > 0 else 0
-                        }
-                
-                # 综合评分
-                close_coverage = fields_quality.get('close', {}).get('coverage_rate', 0)
-                vol_coverage = fields_quality.get('vol', {}).get('coverage_rate', 0)
-                amount_coverage = fields_quality.get('amount', {}).get('coverage_rate', 0)
-                
-                # 加权综合评分：收盘价80%，成交量和成交额各10%
-                overall_score = (close_coverage * 0.8 + vol_coverage * 0.1 + amount_coverage * 0.1)
-                
-                quality_info[code] = {
-                    'total_days': total_days,
-                    'fields_quality': fields_quality,
-                    'overall_score': overall_score,
-                    'date_range': (df_period.index.min(), df_period.index.max())
-                }
-                
-                matched_count += 1
-                
-            except Exception as e:
-                self.logger.warning(f"处理文件失败: {file_path} - {e}")
-        
-        self.logger.info(f"数据质量分析完成: {matched_count} 个标的")
+        target_files = {}
+        for code in universe_codes:
+            candidate = processed_path / f"{code}.parquet"
+            if candidate.is_file():
+                target_files[code] = str(candidate)
+        
+        # 兼容子目录存放：仅当有标的未找到时遍历一次
+        missing = set(universe_codes) - target_files.keys()
+        if missing:
+            for file_path in glob.iglob(str(processed_path / "**/*.parquet"), recursive=True):
+                code = Path(file_path).stem
+                if code in missing and code not in target_files:
+                    target_files[code] = file_path
+        
+        self.logger.info(f"扫描数据文件: {len(target_files)} 个universe标的文件")
+        
+        # 磁盘缓存：文件mtime未变化的标的直接复用上次扫描结果
+        cache_path = self.base_path / QUALITY_CACHE_FILE
+        cache_df = self._load_quality_cache(cache_path)
+        window = cache_df[(cache_df['start_date'] == start_date) & 
+                          (cache_df['end_date'] == end_date)] if not cache_df.empty else cache_df
+        cached = {rec['path']: rec for rec in window.to_dict('records')}
+        
+        results = {}
+        mtimes = {}
+        to_scan = {}
+        for code, file_path in target_files.items():
+            mtimes[code] = os.path.getmtime(file_path)
+            rec = cached.get(file_path)
+            if rec is not None and rec['mtime'] == mtimes[code]:
+                results[code] = rec
+            else:
+                to_scan[code] = file_path
+        
+        self.logger.info(f"缓存命中: {len(results)} 个，需扫描: {len(to_scan)} 个")
+        
+        # 待扫描文件统一用一个dataset句柄打开（内存映射），按fragment保留文件粒度；
+        # 显式给定空schema，避免构建时探测文件；各fragment按自身物理schema读取
+        if to_scan:
+            dataset = ds.dataset(list(to_scan.values()), schema=pa.schema([]), format='parquet',
+                                 filesystem=pafs.LocalFileSystem(use_mmap=True))
+            # 扫描结果按fragment路径对应回标的代码，不依赖dataset保持输入顺序
+            code_by_path = {os.path.normpath(path): code for code, path in to_scan.items()}
+            # 各文件相互独立，且pyarrow读取/解压会释放GIL，用线程池并行扫描
+            with ThreadPoolExecutor() as executor:
+                scanned = executor.map(lambda f: (f.path, self._analyze_file(f, start_date, end_date)), 
+                                       dataset.get_fragments())
+                for path, info in scanned:
+                    results[code_by_path[os.path.normpath(path)]] = info
+        
+        # 按universe顺序整理结果
+        records = {code: results[code] for code in target_files if results.get(code) is not None}
+        quality_info = _build_quality_frame(records)
+        
+        if to_scan:
+            cache_rows = [dict({metric: rec[metric] for metric in QUALITY_METRICS}, 
+                               path=target_files[code], mtime=mtimes[code], 
+                               start_date=start_date, end_date=end_date) 
+                          for code, rec in records.items()]
+            self._save_quality_cache(cache_path, cache_df, start_date, end_date, cache_rows)
+        
+        self.logger.info(f"数据质量分析完成: {len(quality_info)} 个标的")
+        self._quality_cache[cache_key] = quality_info
         return quality_info
     
+    def _load_quality_cache(self, cache_path: Path) -> pd.DataFrame:
+        """读取质量指标磁盘缓存，不存在或损坏时返回空表"""
+        if not cache_path.exists():
+            return pd.DataFrame()
+        try:
+            return pd.read_parquet(cache_path)
+        except Exception as e:
+            self.logger.warning(f"读取质量缓存失败，将重新扫描: {e}")
+            return pd.DataFrame()
+    
+    def _save_quality_cache(self, cache_path: Path, cache_df: pd.DataFrame, 
+                            start_date: str, end_date: str, records: List[Dict]):
+        """用本次结果替换同一日期范围的缓存记录，并原子写回磁盘"""
+        new_df = pd.DataFrame(records)
+        if not cache_df.empty:
+            others = cache_df[(cache_df['start_date'] != start_date) | 
+                              (cache_df['end_date'] != end_date)]
+            new_df = pd.concat([others, new_df], ignore_index=True)
+        
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            new_df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            self.logger.warning(f"写入质量缓存失败: {e}")
+    
+    def _analyze_file(self, fragment: ds.ParquetFileFragment, 
+                      start_date: str, end_date: str) -> Optional[Dict]:
+        """计算单个标的文件的数据质量指标
+        
+        Args:
+            fragment: 单个Parquet文件对应的dataset fragment
+            start_date: 开始日期，格式YYYY-MM-DD
+            end_date: 结束日期，格式YYYY-MM-DD
+            
+        Returns:
+            质量指标记录（QUALITY_METRICS各字段）；日期范围内无数据或读取失败时返回None
+        """
+        try:
+            table = self._read_period(fragment, start_date, end_date)
+            
+            # 计算数据质量指标
+            total_days = table.num_rows
+            if total_days == 0:
+                return None
+            
+            # 检查各字段的完整性（直接在Arrow列上统计，不构造pandas DataFrame）
+            record = {'total_days': total_days}
+            for field in QUALITY_FIELDS:
+                record[f'{field}_valid'] = (_valid_count(table[field]) 
+                                            if field in table.column_names else np.nan)
+            
+            date_min_max = pc.min_max(table['trade_date'])
+            record['date_min'] = pd.Timestamp(date_min_max['min'].as_py())
+            record['date_max'] = pd.Timestamp(date_min_max['max'].as_py())
+            return record
+            
+        except Exception as e:
+            self.logger.warning(f"处理文件失败: {fragment.path} - {e}")
+            return None
+    
+    def _read_period(self, fragment: ds.ParquetFileFragment, 
+                     start_date: str, end_date: str) -> pa.Table:
+        """只读取质量分析所需的列和日期范围
+        
+        通过列裁剪和trade_date谓词下推，跳过无关列和日期范围外的row group；
+        保持为Arrow表，不转换为pandas。
+        
+        Args:
+            fragment: 单个Parquet文件对应的dataset fragment
+            start_date: 开始日期，格式YYYY-MM-DD
+            end_date: 结束日期，格式YYYY-MM-DD
+            
+        Returns:
+            限定在日期范围内的Arrow表，trade_date为时间戳列
+        """
+        schema = fragment.physical_schema
+        if 'trade_date' not in schema.names:
+            raise ValueError("缺少 trade_date 字段或索引")
+        
+        columns = ['trade_date'] + [f for f in QUALITY_FIELDS if f in schema.names]
+        start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        
+        # 日期为时间戳类型时可下推过滤，否则读取后转换类型再按范围过滤
+        if pa.types.is_timestamp(schema.field('trade_date').type):
+            date_filter = (ds.field('trade_date') >= start_ts) & (ds.field('trade_date') <= end_ts)
+            return fragment.to_table(schema=schema, columns=columns, filter=date_filter)
+        
+        table = fragment.to_table(schema=schema, columns=columns)
+        dates = pa.array(pd.to_datetime(table['trade_date'].to_pandas()))
+        table = table.set_column(table.column_names.index('trade_date'), 'trade_date', dates)
+        mask = pc.and_(pc.greater_equal(dates, pa.scalar(start_ts, type=dates.type)),
+                       pc.less_equal(dates, pa.scalar(end_ts, type=dates.type)))
+        return table.filter(mask)
+    
     def filter_high_quality_universe(self, 
                                    min_coverage_rate: float = 0.65,
                                    min_close_coverage: float = 0.8,
                                    min_trading_days: int = 100,
-                                   max_universe_size: int = 150) -> List[str]:
+                                   max_universe_size: int = 150,
+                                   quality_info: pd.DataFrame = None) -> List[str]:
         """筛选高质量标的池
         
         Args:
@@ -162,38 +308,28 @@ class UniverseFilter:
             min_close_coverage: 最低收盘价覆盖率
             min_trading_days: 最少交易天数
             max_universe_size: 最大标的数量
+            quality_info: 已计算的数据质量指标表，None时调用analyze_data_quality()
             
         Returns:
             高质量标的代码列表
         """
-        quality_info = self.analyze_data_quality()
+        if quality_info is None:
+            quality_info = self.analyze_data_quality()
         
-        if not quality_info:
+        if quality_info.empty:
             self.logger.error("无数据质量信息，无法筛选")
             return []
         
-        # 筛选条件
-        candidates = []
-        
-        for code, info in quality_info.items():
-            # 基本条件筛选
-            if info['total_days'] < min_trading_days:
-                continue
-            
-            # 收盘价覆盖率检查
-            close_coverage = info['fields_quality'].get('close', {}).get('coverage_rate', 0)
-            if close_coverage < min_close_coverage:
-                continue
-            
-            # 综合评分检查
-            if info['overall_score'] < min_coverage_rate:
-                continue
-            
-            candidates.append((code, info['overall_score']))
+        # 基本条件、收盘价覆盖率、综合评分三项同时满足（整列比较）
+        # 指标为float32，阈值同样转为float32，避免0.65等阈值恰好相等时因精度被误排除
+        mask = ((quality_info['total_days'] >= min_trading_days) & 
+                (quality_info['close_coverage'].fillna(0) >= np.float32(min_close_coverage)) & 
+                (quality_info['overall_score'] >= np.float32(min_coverage_rate)))
+        candidates = quality_info.loc[mask, 'overall_score']
         
-        # 按综合评分排序，取前N个
-        candidates.sort(key=lambda x: x[1], reverse=True)
-        selected_codes = [code for code, score in candidates[:max_universe_size]]
+        # 按综合评分部分选择前N个（无需全量排序，同分保持原顺序）
+        top = candidates.nlargest(max_universe_size, keep='first')
+        selected_codes = top.index.tolist()
         
         self.logger.info(f"高质量标的筛选完成:")
         self.logger.info(f"  原始标的数: {len(quality_info)}")
@@ -201,11 +337,10 @@ class UniverseFilter:
         self.logger.info(f"  最终选择数: {len(selected_codes)}")
         
         # 显示筛选统计
-        if candidates:
-            scores = [score for _, score in candidates[:max_universe_size]]
-            self.logger.info(f"  平均质量评分: {np.mean(scores):.3f}")
-            self.logger.info(f"  最低质量评分: {np.min(scores):.3f}")
-            self.logger.info(f"  最高质量评分: {np.max(scores):.3f}")
+        if not top.empty:
+            self.logger.info(f"  平均质量评分: {top.mean():.3f}")
+            self.logger.info(f"  最低质量评分: {top.min():.3f}")
+            self.logger.info(f"  最高质量评分: {top.max():.3f}")
         
         return selected_codes
     
@@ -6,6 +6,7 @@
 """
 
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -62,7 +63,7 @@ def main():
         # 4. 保存因子数据
         print("\n4. 保存因子数据...")
         data_interface.save_factor_data(factors_df, "all_factors")
-        output_path = PROJECT_ROOT / "reports" / "factors" / "all_factors.parquet"
+        output_path = PROJECT_ROOT / "reports" / "factors" / "all_factors.arrow"
         print(f"   因子数据已保存至: {output_path}")
         
         # 5. 生成简单统计报告
@@ -81,6 +82,12 @@ def main():
         return False
 
 
+def _count_valid(df: pd.DataFrame) -> int:
+    """统计DataFrame中的非NaN值个数（单次numpy归约）"""
+    arr = df.to_numpy(dtype='float64', na_value=np.nan)
+    return int(np.count_nonzero(~np.isnan(arr)))
+
+
 def generate_factor_report(factors_df: pd.DataFrame):
     """生成因子基础统计报告"""
     try:
@@ -89,11 +96,16 @@ def generate_factor_report(factors_df: pd.DataFrame):
         print(f"\n   因子数量: {len(factor_names)}")
         print("   各因子覆盖率统计:")
         
+        # 各因子覆盖率只统计一次，控制台输出和报告文件共用
+        coverages = {}
+        valid_total = 0
         for factor_name in factor_names:
             factor_data = factors_df[factor_name]
             total_values = factor_data.size
-            valid_values = factor_data.notna().sum().sum()
+            valid_values = _count_valid(factor_data)
             coverage = valid_values / total_values if total_values > 0 else 0
+            coverages[factor_name] = coverage
+            valid_total += valid_values
             
             print(f"     {factor_name}: {coverage:.2%} ({valid_values}/{total_values})")
         
@@ -109,14 +121,10 @@ def generate_factor_report(factors_df: pd.DataFrame):
             f.write(f"因子数量: {len(factor_names)}\n")
             f.write(f"标的数量: {len(factors_df.columns.get_level_values(1).unique())}\n")
             f.write(f"总观测值: {factors_df.size}\n")
-            f.write(f"有效观测值: {factors_df.notna().sum().sum()}\n\n")
+            f.write(f"有效观测值: {valid_total}\n\n")
             
             f.write("各因子覆盖率:\n")
-            for factor_name in factor_names:
-                factor_data = factors_df[factor_name]
-                total_values = factor_data.size
-                valid_values = factor_data.notna().sum().sum()
-                coverage = valid_values / total_values if total_values > 0 else 0
+            for factor_name, coverage in coverages.items():
                 f.write(f"  {factor_name}: {coverage:.2%}\n")
         
         print(f"   统计报告已保存至: {report_path}")
@@ -6,6 +6,7 @@
 """
 
 import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -151,10 +152,32 @@ def load_ic_timeseries():
         return pd.DataFrame()
 
 
+def _fusion_stats(result_df: pd.DataFrame) -> dict:
+    """在底层数组上一次性统计融合因子的有效观测与分布（不构造stack后的长表）"""
+    arr = result_df.to_numpy(dtype='float64', na_value=np.nan)
+    valid_mask = ~np.isnan(arr)
+    values = arr[valid_mask]
+    
+    stats = {
+        # 与dropna()一致：只统计无缺失的完整行
+        'complete_size': int(valid_mask.all(axis=1).sum()) * arr.shape[1],
+        'total_size': arr.size,
+    }
+    if values.size > 0:
+        stats.update({
+            'mean': values.mean(),
+            'std': values.std(ddof=1) if values.size > 1 else np.nan,
+            'min': values.min(),
+            'max': values.max(),
+        })
+    return stats
+
+
 def generate_fusion_report(fusion_results: dict):
     """生成融合统计报告"""
     try:
         report_path = PROJECT_ROOT / "reports" / "fusion_summary.txt"
+        fusion_stats = {}
         
         with open(report_path, 'w', encoding='utf-8') as f:
             f.write("因子融合统计报告\n")
@@ -173,15 +196,15 @@ def generate_fusion_report(fusion_results: dict):
                 f.write(f"  数据形状: {result_df.shape}\n")
                 f.write(f"  时间范围: {result_df.index.min()} 至 {result_df.index.max()}\n")
                 f.write(f"  标的数量: {len(result_df.columns)}\n")
-                f.write(f"  有效观测: {result_df.dropna().size} / {result_df.size}\n")
+                stats = fusion_stats[method] = _fusion_stats(result_df)
+                f.write(f"  有效观测: {stats['complete_size']} / {stats['total_size']}\n")
                 
                 # 基础统计
-                fusion_values = result_df.stack().dropna()
-                if len(fusion_values) > 0:
-                    f.write(f"  均值: {fusion_values.mean():.6f}\n")
-                    f.write(f"  标准差: {fusion_values.std():.6f}\n")
-                    f.write(f"  最小值: {fusion_values.min():.6f}\n")
-                    f.write(f"  最大值: {fusion_values.max():.6f}\n")
+                if 'mean' in stats:
+                    f.write(f"  均值: {stats['mean']:.6f}\n")
+                    f.write(f"  标准差: {stats['std']:.6f}\n")
+                    f.write(f"  最小值: {stats['min']:.6f}\n")
+                    f.write(f"  最大值: {stats['max']:.6f}\n")
                 
                 f.write("\n")
         
@@ -191,7 +214,8 @@ def generate_fusion_report(fusion_results: dict):
         print("\n   融合结果简要统计:")
         for method, result_df in fusion_results.items():
             if not result_df.empty:
-                coverage = result_df.dropna().size / result_df.size
+                stats = fusion_stats[method]
+                coverage = stats['complete_size'] / stats['total_size']
                 print(f"     {method}: 形状{result_df.shape}, 覆盖率{coverage:.1%}")
             else:
                 print(f"     {method}: 空结果")
@@ -3,7 +3,9 @@
 量化因子框架完整测试
 验证端到端的因子计算、IC分析、因子融合流程
 """
+import os
 import sys
+import json
 import time
 from pathlib import Path
 import pandas as pd
@@ -44,17 +46,26 @@ def main():
         
         print(f"启用的因子: {enabled_factors}")
         
-        # 计算因子
+        # 批量计算因子（各因子并行，引擎日志可能交错），逐因子结果先汇总为表格，循环结束后一次性输出
         factor_results = {}
-        for factor_name in enabled_factors:
-            print(f"   计算因子: {factor_name}")
-            factor_df = factor_engine.compute_factor(factor_name, price_data, fin_data)
-            if not factor_df.empty:
+        rows = []
+        computed = factor_engine.compute_factors(enabled_factors, price_data, fin_data, 
+                                                 max_workers=os.cpu_count() or 1)
+        for factor_name, factor_df in computed.items():
+            success = not factor_df.empty
+            if success:
                 factor_results[factor_name] = factor_df
-                print(f"   ✅ {factor_name}: {factor_df.shape}")
-            else:
-                print(f"   ❌ {factor_name}: 计算失败")
-        
+            rows.append({
+                'factor': factor_name,
+                'success': success,
+                'dates': factor_df.shape[0],
+                'codes': factor_df.shape[1],
+                'coverage': factor_df.notna().to_numpy().mean() if success else 0.0,
+            })
+        
+        summary = pd.DataFrame(rows)
+        if not summary.empty:
+            print(summary.round({'coverage': 4}).to_string(index=False))
         print(f"✅ 成功计算 {len(factor_results)} 个因子")
         
         # 3. 计算IC分析
@@ -71,11 +82,16 @@ def main():
             ic_series = ic_engine.calc_ic_timeseries(factor_df, forward_returns)
             if not ic_series.empty:
                 ic_results[factor_name] = ic_series
-                ic_mean = ic_series.mean()
-                ic_ir = ic_mean / ic_series.std() if ic_series.std() > 0 else 0
-                print(f"   {factor_name}: IC={ic_mean:.4f}, IR={ic_ir:.4f}")
         
         ic_df = pd.DataFrame(ic_results)
+        
+        # 整表一次性计算IC均值和IR，避免逐因子重复调用std()
+        ic_means = ic_df.mean()
+        ic_stds = ic_df.std()
+        ic_irs = np.where(ic_stds > 0, ic_means / ic_stds, 0.0)
+        for factor_name, ic_mean, ic_ir in zip(ic_df.columns, ic_means, ic_irs):
+            print(f"   {factor_name}: IC={ic_mean:.4f}, IR={ic_ir:.4f}")
+        
         ic_report = ic_engine.generate_ic_report(ic_df)
         print(f"✅ IC分析完成，矩阵形状: {ic_df.shape}")
         
@@ -127,18 +143,18 @@ def main():
         # 保存IC报告
         ic_engine.save_ic_results(ic_report)
         
-        # 保存因子数据
-        for factor_name, factor_df in factor_results.items():
-            factor_df.to_csv(output_dir / f"{factor_name}.csv")
+        # 保存因子数据（所有因子合并为单个Arrow文件）；使用测试专用文件名，
+        # 不覆盖run_factors生成、供run_ic/run_fusion读取的all_factors
+        data_interface.save_factor_data(factor_matrix, "test_all_factors")
         
         # 保存融合因子
         equal_factor.to_csv(output_dir / "fusion_equal_weight.csv")
         ic_factor.to_csv(output_dir / "fusion_ic_weight.csv")
         
-        # 保存权重
-        weights_df = pd.DataFrame([equal_weights, ic_weights], 
-                                 index=['equal_weight', 'ic_weight'])
-        weights_df.to_csv(Path("reports") / "fusion_weights.csv")
+        # 保存权重（直接序列化权重字典，无需构造DataFrame）
+        weights = {'equal_weight': equal_weights, 'ic_weight': ic_weights}
+        Path("reports/fusion_weights.json").write_text(
+            json.dumps(weights, ensure_ascii=False, indent=2, default=float), encoding='utf-8')
         
         print("✅ 所有结果已保存")
         
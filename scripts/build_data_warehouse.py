@@ -1,4 +1,4 @@
-import pandas as pd, datetime as dt
+import pandas as pd, numpy as np, datetime as dt
 from pathlib import Path
 from tqdm import tqdm
 import logging
@@ -29,6 +29,12 @@ logger = logging.getLogger("etf_data_warehouse")
 # 配置参数
 BASE  = Path(__file__).resolve().parents[1]   # 项目根目录
 THREADS = 1  # 并行线程数
+BATCH_SIZE = 50  # 批量增量更新时单次请求的标的数
+
+def _prev_trading_day() -> pd.Timestamp:
+    """上一个工作日（近似上一交易日，不考虑节假日）"""
+    today = np.datetime64(dt.date.today(), 'D')
+    return pd.Timestamp(np.busday_offset(today, -1, roll='forward'))
 
 def process_target(code, force_refresh=False):
     """处理单个ETF/指数的数据获取和清洗流程
@@ -41,6 +47,13 @@ def process_target(code, force_refresh=False):
         成功处理返回True，否则返回False
     """
     try:
+        # 本地数据已到上一交易日则直接跳过，只读Parquet元数据，不请求Tushare
+        if not force_refresh:
+            last_date = S.read_max_date(S.processed_path(BASE, code))
+            if last_date is not None and last_date >= _prev_trading_day():
+                logger.info(f"⏭️ {code} 本地数据已是最新（至{last_date.date()}），跳过")
+                return True
+        
         # 获取日线数据（自动获取全部历史数据，带缓存检查）
         price = F.fetch_daily_with_cache(code, start=None, end=dt.date.today().strftime("%Y%m%d"), 
                                         base_dir=str(BASE), force_refresh=force_refresh)
@@ -72,6 +85,86 @@ def process_target(code, force_refresh=False):
         logger.error(f"❌ 处理 {code} 时出错: {str(e)}")
         return False
 
+def _plan_batches(stale: dict, end: str) -> list:
+    """按预计返回行数划分批量请求
+    
+    按最后日期从新到旧排列，依次加入当前批次；批次的区间由其中最早的日期决定，
+    当 预计行数 × 代码数 超过 FUND_DAILY_ROW_BUDGET 或达到BATCH_SIZE时另起一批。
+    单个代码的区间已超出预算时不参与批量，交由逐个获取。
+    
+    Args:
+        stale: {代码: 本地最后日期}
+        end: 结束日期，格式YYYYMMDD
+        
+    Returns:
+        批次列表，每个批次为 {代码: 本地最后日期}
+    """
+    batches, current = [], {}
+    for code, last_date in sorted(stale.items(), key=lambda kv: kv[1], reverse=True):
+        start = (last_date + pd.Timedelta(days=1)).strftime("%Y%m%d")
+        rows = F.estimate_daily_rows(start, end)
+        if rows > F.FUND_DAILY_ROW_BUDGET:
+            continue  # 缺口过长，单独获取更稳妥
+        if current and (len(current) >= BATCH_SIZE or rows * (len(current) + 1) > F.FUND_DAILY_ROW_BUDGET):
+            batches.append(current)
+            current = {}
+        current[code] = last_date
+    if current:
+        batches.append(current)
+    return batches
+
+def update_incremental(codes):
+    """批量增量更新本地已有数据但已过期的ETF
+    
+    按预计返回行数分组（每组不超过BATCH_SIZE个），每组只发起一次fund_daily请求拉取缺失区间，
+    再与本地数据合并保存。指数/股票接口不支持多代码请求，仍走逐个获取。
+    
+    Args:
+        codes: 标的代码列表
+        
+    Returns:
+        已完成更新（含确认无新数据）的代码集合
+    """
+    prev_day = _prev_trading_day()
+    stale = {}
+    for code in codes:
+        if F.detect_asset_type(code) != 'fund':
+            continue
+        last_date = S.read_max_date(S.processed_path(BASE, code))
+        if last_date is not None and last_date < prev_day:
+            stale[code] = last_date
+    
+    if not stale:
+        return set()
+    
+    end = dt.date.today().strftime("%Y%m%d")
+    batches = _plan_batches(stale, end)
+    logger.info(f"批量增量更新 {sum(map(len, batches))}/{len(stale)} 个ETF，共 {len(batches)} 批")
+    done = set()
+    
+    for chunk in batches:
+        start = (min(chunk.values()) + pd.Timedelta(days=1)).strftime("%Y%m%d")
+        batch = F.fetch_daily_batch(list(chunk), start, end)
+        if batch is None:
+            continue  # 批量失败，交由逐个获取处理
+        
+        for code, last_date in chunk.items():
+            try:
+                new = batch.get(code)
+                if new is not None:
+                    new = new[new.index > last_date]
+                if new is not None and not new.empty:
+                    old = pd.read_parquet(S.processed_path(BASE, code))
+                    merged = pd.concat([old, new])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                    S.save_processed_data(merged, BASE, code)
+                    logger.info(f"✅ {code} 增量更新 {len(new)} 个交易日")
+                done.add(code)
+            except Exception as e:
+                logger.error(f"❌ 增量更新 {code} 时出错: {str(e)}")
+    
+    return done
+
 def main():
     logger.info("开始构建ETF/指数数据仓库...")
     
@@ -87,24 +180,28 @@ def main():
         logger.info("🔄 强制刷新模式：将重新下载所有数据")
     
     try:
-        codes = pd.read_csv(BASE/f"config/{universe_file}")["ts_code"].tolist()
+        codes = pd.read_csv(BASE/f"config/{universe_file}", usecols=["ts_code"], dtype={"ts_code": str})["ts_code"].tolist()
         logger.info(f"标的池读取成功，共 {len(codes)} 个标的 (来源: {universe_file})")
     except Exception as e:
         logger.error(f"读取标的池失败: {str(e)}")
         return
     
+    # 已有本地数据的ETF先批量增量更新，减少请求次数
+    batched = set() if force_refresh else update_incremental(codes)
+    pending = [code for code in codes if code not in batched]
+    
     # 修改process_target函数调用，传递force_refresh参数
     def process_target_with_cache(code):
         return process_target(code, force_refresh)
     
     # 并行处理各标的数据
-    success_count = 0
+    success_count = len(batched)
     with concurrent.futures.ThreadPoolExecutor(max_workers=THREADS) as executor:
         # 提交所有任务
-        futures = {executor.submit(process_target_with_cache, code): code for code in codes}
+        futures = {executor.submit(process_target_with_cache, code): code for code in pending}
         
         # 处理结果
-        for future in tqdm(concurrent.futures.as_completed(futures), total=len(codes), ncols=80):
+        for future in tqdm(concurrent.futures.as_completed(futures), total=len(pending), ncols=80):
             code = futures[future]
             try:
                 if future.result():
@@ -4,22 +4,26 @@
 从universe.csv中筛选有历史数据且适合分析的标的，支持各种过滤条件
 """
 
+import re
 import pandas as pd
-import tushare as ts
-import os
 import argparse
-from dotenv import load_dotenv
 from pathlib import Path
 import logging
-from tqdm import tqdm
-
-load_dotenv()
-pro = ts.pro_api(os.getenv("TUSHARE_TOKEN"))
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# ETF名称过滤关键字（模块加载时编译一次，供整列str.contains使用）
+BOND_ETF_PATTERN = re.compile('货币|债券|可转债|国债|短债|中债|长债')
+SPECIAL_ETF_PATTERN = re.compile('REITs|QDII|商品|黄金|原油|白银')
+
+# 主要指数代码集合（本地判定，无需逐个请求接口探测历史数据）
+MAIN_INDICES = frozenset([
+    '000001.SH', '000300.SH', '000905.SH', '000852.SH',
+    '399001.SZ', '399006.SZ', '000688.SH', '000016.SH', '932000.CSI'
+])
+
 def filter_universe(target_type='both', etf_type='main', index_type='main', 
                     output_file='universe_small.csv'):
     """
@@ -32,13 +36,18 @@ def filter_universe(target_type='both', etf_type='main', index_type='main',
         output_file: 输出文件名
     """
     
-    # 读取完整标的池
+    # 读取完整标的池：优先使用update_universe同步生成的Parquet（不早于CSV时）
     universe_file = Path(__file__).parent.parent / "config" / "universe.csv"
-    if not universe_file.exists():
+    parquet_file = universe_file.with_suffix('.parquet')
+    if not universe_file.exists() and not parquet_file.exists():
         logger.error(f"标的池文件不存在: {universe_file}")
         return
     
-    df = pd.read_csv(universe_file)
+    if parquet_file.exists() and (not universe_file.exists() or 
+                                  parquet_file.stat().st_mtime >= universe_file.stat().st_mtime):
+        df = pd.read_parquet(parquet_file)
+    else:
+        df = pd.read_csv(universe_file)
     logger.info(f"原始标的池大小: {len(df)}")
     
     # 过滤目标类型
@@ -50,51 +59,40 @@ def filter_universe(target_type='both', etf_type='main', index_type='main',
     
     logger.info(f"按类型过滤后: {len(df)}")
     
-    # 简化过滤条件，只基于名称和代码进行过滤
-    valid_targets = []
-    failed_targets = []
+    # 简化过滤条件，只基于名称和代码进行过滤（整列布尔掩码，无逐行循环）
+    failed_parts = []
+    keep = pd.Series(True, index=df.index)
+    is_etf = df['target_type'] == 'ETF'
+    names = df['name']
     
-    for idx, row in tqdm(df.iterrows(), total=len(df), desc="过滤标的池"):
-        ts_code = row['ts_code']
-        row_target_type = row['target_type']
-        name = row['name']
+    if etf_type == 'main':
+        # 跳过货币ETF和债券ETF
+        is_bond = is_etf & names.str.contains(BOND_ETF_PATTERN, na=False)
+        # 跳过一些特殊类型的ETF
+        is_special = is_etf & ~is_bond & names.str.contains(SPECIAL_ETF_PATTERN, na=False)
         
-        try:
-            # 根据类型进行不同的检查
-            if row_target_type == 'ETF':
-                # ETF过滤逻辑
-                if etf_type == 'main':
-                    # 跳过货币ETF和债券ETF
-                    if any(keyword in name for keyword in ['货币', '债券', '可转债', '国债', '短债', '中债', '长债']):
-                        failed_targets.append((ts_code, "过滤掉货币/债券ETF"))
-                        continue
-                    
-                    # 跳过一些特殊类型的ETF
-                    if any(keyword in name for keyword in ['REITs', 'QDII', '商品', '黄金', '原油', '白银']):
-                        failed_targets.append((ts_code, "过滤掉特殊类型ETF"))
-                        continue
-            
-            else:
-                # 指数过滤逻辑
-                if index_type == 'main':
-                    # 只保留主要指数
-                    main_indices = ['000001.SH', '000300.SH', '000905.SH', '000852.SH', 
-                                    '399001.SZ', '399006.SZ', '000688.SH', '000016.SH', '932000.CSI']
-                    if ts_code not in main_indices:
-                        failed_targets.append((ts_code, "非主要指数"))
-                        continue
-            
-            # 通过所有检查，加入有效列表
-            valid_targets.append(row)
-            
-        except Exception as e:
-            failed_targets.append((ts_code, f"检查出错: {str(e)}"))
-            continue
+        failed_parts.append(pd.DataFrame({'ts_code': df.loc[is_bond, 'ts_code'], 'reason': "过滤掉货币/债券ETF"}))
+        failed_parts.append(pd.DataFrame({'ts_code': df.loc[is_special, 'ts_code'], 'reason': "过滤掉特殊类型ETF"}))
+        keep &= ~(is_bond | is_special)
     
-    # 创建过滤后的标的池
-    if valid_targets:
-        filtered_df = pd.DataFrame(valid_targets)
+    if index_type == 'main':
+        # 只保留主要指数
+        non_main = ~is_etf & ~df['ts_code'].isin(MAIN_INDICES)
         
+        failed_parts.append(pd.DataFrame({'ts_code': df.loc[non_main, 'ts_code'], 'reason': "非主要指数"}))
+        keep &= ~non_main
+    
+    filtered_df = df[keep]
+    
+    # 失败记录按过滤原因整块构造，只生成一次，保存和统计共用；
+    # 按原始行索引排序，恢复标的池中的原有顺序
+    if failed_parts:
+        failed_df = pd.concat(failed_parts).sort_index(kind='stable').reset_index(drop=True)
+    else:
+        failed_df = pd.DataFrame(columns=['ts_code', 'reason'])
+    
+    # 创建过滤后的标的池
+    if not filtered_df.empty:
         # 保存过滤后的标的池
         output_path = Path(__file__).parent.parent / "config" / output_file
         filtered_df.to_csv(output_path, index=False)
@@ -103,8 +101,7 @@ def filter_universe(target_type='both', etf_type='main', index_type='main',
         logger.info(f"过滤后标的池已保存至: {output_path}")
         
         # 保存失败记录
-        if failed_targets:
-            failed_df = pd.DataFrame(failed_targets, columns=['ts_code', 'reason'])
+        if not failed_df.empty:
             failed_file = output_path.parent / f"{output_file.replace('.csv', '_failed.csv')}"
             failed_df.to_csv(failed_file, index=False)
             logger.info(f"失败标的记录已保存至: {failed_file}")
@@ -113,14 +110,15 @@ def filter_universe(target_type='both', etf_type='main', index_type='main',
         print("\n=== 过滤结果统计 ===")
         print(f"原始标的数量: {len(df)}")
         print(f"有效标的数量: {len(filtered_df)}")
-        print(f"失败标的数量: {len(failed_targets)}")
+        print(f"失败标的数量: {len(failed_df)}")
         
         if len(filtered_df) > 0:
             print(f"\n有效标的类型分布:")
-            print(filtered_df['target_type'].value_counts())
+            # Parquet读入的类型列为category，只显示实际出现的类型
+            type_counts = filtered_df['target_type'].value_counts()
+            print(type_counts[type_counts > 0])
             
         print(f"\n失败原因统计:")
-        failed_df = pd.DataFrame(failed_targets, columns=['ts_code', 'reason'])
         print(failed_df['reason'].value_counts())
         
     else:
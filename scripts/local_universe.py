@@ -7,6 +7,40 @@
 import pandas as pd
 import os
 import sys
+from pathlib import Path
+
+CODE_COLUMN = '跟踪指数代码'
+
+def read_tracking_codes(etf_file: str) -> pd.DataFrame:
+    """读取"标的"sheet中的跟踪指数代码列
+    
+    首次读取Excel后在同目录缓存一份Parquet（如ETF0725.parquet），
+    Excel未更新时直接读取缓存，避免重复解析xlsx。
+    
+    Args:
+        etf_file: Excel文件路径
+        
+    Returns:
+        只含跟踪指数代码列的DataFrame；Excel中缺少该列时返回空列的DataFrame
+    """
+    cache = Path(etf_file).with_suffix('.parquet')
+    if cache.exists() and cache.stat().st_mtime >= Path(etf_file).stat().st_mtime:
+        print(f"使用缓存文件: {cache}")
+        return pd.read_parquet(cache)
+    
+    # 只解析需要的列
+    df = pd.read_excel(etf_file, sheet_name='标的', usecols=lambda col: col == CODE_COLUMN)
+    if CODE_COLUMN in df.columns:
+        tmp_cache = cache.with_name(cache.name + '.tmp')
+        try:
+            # 先写临时文件再替换，避免写入中断留下损坏的缓存
+            df[[CODE_COLUMN]].astype('string').to_parquet(tmp_cache, index=False)
+            os.replace(tmp_cache, cache)
+        except Exception as e:
+            # 缓存只是加速手段，写入失败不影响本次读取结果
+            print(f"警告: 写入缓存文件 {cache} 失败: {e}")
+            tmp_cache.unlink(missing_ok=True)
+    return df
 
 def main():
     # 设置文件路径
@@ -22,20 +56,20 @@ def main():
     print(f"读取文件: {etf_file}")
     
     try:
-        # 读取Excel文件的"标的"sheet
-        df = pd.read_excel(etf_file, sheet_name='标的')
+        # 读取Excel文件"标的"sheet的跟踪指数代码列（优先使用缓存）
+        df = read_tracking_codes(etf_file)
         
         print(f"成功读取Excel文件，共有 {len(df)} 行数据")
-        print("列名:", df.columns.tolist())
         
         # 检查是否存在"跟踪指数代码"列
-        if '跟踪指数代码' not in df.columns:
+        if CODE_COLUMN not in df.columns:
             print("错误: 未找到'跟踪指数代码'列")
-            print("可用的列名:", df.columns.tolist())
+            all_columns = pd.read_excel(etf_file, sheet_name='标的', nrows=0).columns
+            print("可用的列名:", all_columns.tolist())
             return False
         
         # 提取跟踪指数代码列
-        tracking_codes = df['跟踪指数代码'].dropna().unique()
+        tracking_codes = df[CODE_COLUMN].dropna().unique()
         
         print(f"找到 {len(tracking_codes)} 个唯一的跟踪指数代码")
         
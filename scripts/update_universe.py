@@ -1,125 +1,113 @@
 #!/usr/bin/env python3
 """
 ETF/指数池更新工具
-获取所有ETF和指数，保存到config/universe.csv
+获取所有ETF和指数，保存到config/universe.csv（及universe.parquet）
 """
 
+import io
 import os
+import sys
 import pandas as pd
-import tushare as ts
 import logging
-import time
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.tushare_client import call
+
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 加载环境变量并初始化Tushare
-load_dotenv()
-pro = ts.pro_api(os.getenv("TUSHARE_TOKEN"))
+# 标的类型列使用统一的分类类型，ETF与指数合并时保持category而不退化为object
+TARGET_TYPE_DTYPE = pd.CategoricalDtype(['ETF', '指数'])
 
 def get_all_etfs():
     """获取所有ETF"""
     try:
-        etf_basic = pro.fund_basic(market='E')
-        time.sleep(1.2)  # API频率控制：每分钟不超过50次
+        etf_basic = call('fund_basic', market='E')  # 带频率控制及当日磁盘缓存
         if etf_basic.empty:
             return pd.DataFrame()
         
-        etf_list = []
-        for _, etf in etf_basic.iterrows():
-            etf_list.append({
-                'ts_code': etf['ts_code'],
-                'name': etf['name'],
-                'target_type': 'ETF',
-                'category': 'ETF'
-            })
+        # 整列选取并广播常量列，无需逐行构造
+        etf_df = etf_basic.loc[:, ['ts_code', 'name']].copy()
+        etf_df['target_type'] = pd.Series('ETF', index=etf_df.index, dtype=TARGET_TYPE_DTYPE)
+        etf_df['category'] = etf_df['target_type']
         
-        logger.info(f"获取到 {len(etf_list)} 只ETF")
-        return pd.DataFrame(etf_list)
+        logger.info(f"获取到 {len(etf_df)} 只ETF")
+        return etf_df
         
     except Exception as e:
         logger.error(f"获取ETF列表失败: {e}")
         return pd.DataFrame()
 
-def get_all_indices():
-    """获取所有指数（包括SSE、SZSE、CSI、CNI）"""
-    all_indices = []
-    
-    # 上交所指数
-    try:
-        sse_indices = pro.index_basic(market='SSE')
-        time.sleep(1.2)  # API频率控制：每分钟不超过50次
-        if not sse_indices.empty:
-            for _, idx in sse_indices.iterrows():
-                all_indices.append({
-                    'ts_code': idx['ts_code'],
-                    'name': idx['name'],
-                    'target_type': '指数',
-                    'category': '指数'
-                })
-            logger.info(f"获取上交所指数 {len(sse_indices)} 个")
-    except Exception as e:
-        logger.warning(f"获取上交所指数失败: {e}")
-    
-    # 深交所指数
-    try:
-        szse_indices = pro.index_basic(market='SZSE')
-        time.sleep(1.2)  # API频率控制：每分钟不超过50次
-        if not szse_indices.empty:
-            for _, idx in szse_indices.iterrows():
-                all_indices.append({
-                    'ts_code': idx['ts_code'],
-                    'name': idx['name'],
-                    'target_type': '指数',
-                    'category': '指数'
-                })
-            logger.info(f"获取深交所指数 {len(szse_indices)} 个")
-    except Exception as e:
-        logger.warning(f"获取深交所指数失败: {e}")
-    
-    # 中证指数
-    try:
-        csi_indices = pro.index_basic(market='CSI')
-        time.sleep(1.2)  # API频率控制：每分钟不超过50次
-        if not csi_indices.empty:
-            for _, idx in csi_indices.iterrows():
-                all_indices.append({
-                    'ts_code': idx['ts_code'],
-                    'name': idx['name'],
-                    'target_type': '指数',
-                    'category': '指数'
-                })
-            logger.info(f"获取中证指数 {len(csi_indices)} 个")
-    except Exception as e:
-        logger.warning(f"获取中证指数失败: {e}")
+# 指数市场及其名称（按此顺序合并结果）
+INDEX_MARKETS = {
+    'SSE': '上交所',
+    'SZSE': '深交所',
+    'CSI': '中证',
+    'CNI': '国证',
+}
+
+def _fetch_market_indices(market):
+    """获取单个市场的指数列表
     
-    # 国证指数
+    Args:
+        market: 市场代码，如'SSE'
+        
+    Returns:
+        指数DataFrame，获取失败或无数据时为空DataFrame
+    """
+    market_name = INDEX_MARKETS[market]
     try:
-        cni_indices = pro.index_basic(market='CNI')
-        time.sleep(1.2)  # API频率控制：每分钟不超过50次
-        if not cni_indices.empty:
-            for _, idx in cni_indices.iterrows():
-                all_indices.append({
-                    'ts_code': idx['ts_code'],
-                    'name': idx['name'],
-                    'target_type': '指数',
-                    'category': '指数'
-                })
-            logger.info(f"获取国证指数 {len(cni_indices)} 个")
+        indices = call('index_basic', market=market)  # 各线程共享频率额度，带当日磁盘缓存
+        if indices.empty:
+            return pd.DataFrame()
+        
+        market_df = indices.loc[:, ['ts_code', 'name']].copy()
+        market_df['target_type'] = pd.Series('指数', index=market_df.index, dtype=TARGET_TYPE_DTYPE)
+        market_df['category'] = market_df['target_type']
+        logger.info(f"获取{market_name}指数 {len(indices)} 个")
+        return market_df
     except Exception as e:
-        logger.warning(f"获取国证指数失败: {e}")
+        logger.warning(f"获取{market_name}指数失败: {e}")
+        return pd.DataFrame()
+
+def get_all_indices():
+    """获取所有指数（包括SSE、SZSE、CSI、CNI）"""
+    # 各市场请求相互独立，并发获取；map保证结果按市场顺序合并
+    with ThreadPoolExecutor(max_workers=len(INDEX_MARKETS)) as executor:
+        market_dfs = [df for df in executor.map(_fetch_market_indices, INDEX_MARKETS) if not df.empty]
     
-    if all_indices:
-        df = pd.DataFrame(all_indices)
+    if market_dfs:
+        df = pd.concat(market_dfs, ignore_index=True)
         df = df.drop_duplicates(subset=['ts_code'])  # 去重
         logger.info(f"获取全部指数 {len(df)} 个（去重后）")
         return df
     else:
         return pd.DataFrame()
 
+def _write_if_changed(payload: bytes, path: Path) -> bool:
+    """内容有变化时原子写入文件
+    
+    与磁盘上现有文件逐字节比较，完全一致则跳过；
+    否则先写临时文件再 os.replace，避免中断时留下不完整的文件。
+    
+    Args:
+        payload: 待写入的文件内容
+        path: 目标文件路径
+        
+    Returns:
+        是否实际写入了文件
+    """
+    if path.is_file() and path.stat().st_size == len(payload) and path.read_bytes() == payload:
+        return False
+    
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+    return True
+
 def update_universe():
     """更新ETF/指数池，获取所有ETF和指数保存到config/universe.csv"""
     
@@ -148,12 +136,23 @@ def update_universe():
     save_path = base_dir / "config" / "universe.csv"
     save_path.parent.mkdir(parents=True, exist_ok=True)
     
-    targets.to_csv(save_path, index=False)
+    # 先在内存中生成CSV，内容与上次一致时不重写文件
+    buf = io.BytesIO()
+    targets.to_csv(buf, index=False)
+    parquet_path = save_path.with_suffix('.parquet')
     
-    logger.info(f"✅ 标的池已更新，共{len(targets)}个标的，已保存至{save_path}")
+    if _write_if_changed(buf.getvalue(), save_path) or not parquet_path.exists():
+        # 同时保存Parquet版本（类型列保持category），供下游快速读取
+        tmp_path = parquet_path.with_name(parquet_path.name + '.tmp')
+        targets.to_parquet(tmp_path, engine='pyarrow', compression='snappy', index=False)
+        os.replace(tmp_path, parquet_path)
+        logger.info(f"✅ 标的池已更新，共{len(targets)}个标的，已保存至{save_path}（及{parquet_path.name}）")
+    else:
+        logger.info(f"✅ 标的池无变化，共{len(targets)}个标的，跳过写入{save_path}")
     print(f"\n📊 标的池统计:")
     print(f"总数量: {len(targets)}")
-    print(targets['target_type'].value_counts().to_string())
+    type_counts = targets['target_type'].value_counts()
+    print(type_counts[type_counts > 0].to_string())
 
 if __name__ == "__main__":
     update_universe()